@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+benchmark decoding of recorded frost responses (see --record)
+sequentially and in the process pool for increasing worker counts
+
+usage:
+python -m printobs.benchdecode DIR [station,station,...] [v]
+"""
+import os
+import sys
+import gzip
+import json
+import time
+from .utils import load_record_index, decode_frost_df
+from .decode import decode_parallel
+
+def load_contents(rdir: str, stations: list = None, v: str = 'v1') -> list:
+    """
+    raw response bodies of all recordings in rdir
+    """
+    index = load_record_index(rdir)
+    contents = []
+    for s in (stations or index.keys()):
+        for e in index.get(s, []):
+            if e['v'] != v:
+                continue
+            with gzip.open(os.path.join(rdir, e['file']), 'rb') as f:
+                contents.append(f.read())
+    return contents
+
+def main():
+    rdir = sys.argv[1]
+    stations = sys.argv[2].split(',') if len(sys.argv) > 2 else None
+    v = sys.argv[3] if len(sys.argv) > 3 else 'v1'
+    contents = load_contents(rdir, stations, v)
+    mb = sum(len(c) for c in contents) / 1e6
+    print(len(contents), 'responses,', f'{mb:.1f}', 'MB,',
+          os.cpu_count(), 'cores')
+    t0 = time.time()
+    for c in contents:
+        decode_frost_df(json.loads(c), v)
+    tseq = time.time() - t0
+    print('sequential:', f'{tseq:.2f}', 's', f'{mb/tseq:.1f}', 'MB/s')
+    nproc = 1
+    while nproc <= os.cpu_count():
+        t0 = time.time()
+        decode_parallel(contents, v, nproc)
+        tpar = time.time() - t0
+        print('nproc', nproc, ':', f'{tpar:.2f}', 's',
+              f'{mb/tpar:.1f}', 'MB/s', 'speedup', f'{tseq/tpar:.2f}')
+        nproc *= 2
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,7 @@ from .utils import format_df, format_info_df
 from .utils import sort_df
 from .utils import dump
 from .utils import print_info
+from .utils import get_frost_location
 
 def main():
     parser = argparse.ArgumentParser(description="""
@@ -36,6 +37,24 @@ def main():
     This is equivalent to the default:
     printobs -s draugen -sd 20220401 -ed 20220404 -avVar Hs -avMode left -avWin 6
 
+    Download a long period in monthly windows and decode them in parallel:
+    printobs -s draugen -sd 20220101 -ed 20221231 -win MS -w nc -p draugen.nc
+
+    Record raw responses and re-process them later without network:
+    printobs -s draugen -sd 20220101 -ed 20221231 -win MS --record /tmp/rec
+    printobs -s draugen -sd 20220101 -ed 20221231 --replay /tmp/rec -w nc -p draugen.nc
+
+    Collocate observations of several stations with a gridded model file:
+    printobs -s draugen,goliat -sd 20220101 -ed 20220201 -colloc mwam.nc -collocVar hs -w nc -p colloc.nc
+
+    Inventory of available time series (headers only) to plan a backfill,
+    the windows of later downloads skip ranges without data:
+    printobs -s draugen,goliat -sd 20160101 -ed 20231231 -inv
+    printobs -s draugen -sd 20160101 -ed 20231231 -win auto -w nc -p draugen.nc
+
+    Plot variables to file (png or svg), several stations are rendered in parallel:
+    printobs -s draugen,goliat -sd 20220401 -ed 20220404 -plot png -plotdir /tmp
+
     """, formatter_class=RawTextHelpFormatter)
     parser.add_argument("-sd", metavar='startdate',
                         help="start date of time period to be downloaded")
@@ -55,6 +74,31 @@ def main():
     parser.add_argument("-avVar", metavar='averageVar', help="average of chosen variable")
     parser.add_argument("-avMode", metavar='averageMode', help="mode for averaging: left, centered, right")
     parser.add_argument("-avWin", metavar='averageWindow', help="window for averaging (nr of obs)")
+    parser.add_argument("-plot", metavar='plotformat',
+            help="plot to file, possible formats are:\n\
+            png\n\
+            svg")
+    parser.add_argument("-plotdir", metavar='plotdir', help="directory for plots (default: .)")
+    parser.add_argument("-nproc", type=int, metavar='nproc', help="number of worker processes")
+    parser.add_argument("-win", metavar='window',
+            help="split period into windows which are decoded in parallel,\n\
+            given as pandas frequency e.g. MS (months), 7D (weeks)\n\
+            or auto to size windows by the inventory (see -inv);\n\
+            the process pool adds overhead, with one core decoding is\n\
+            up to a third slower than sequential, gains need several\n\
+            cores (-nproc), see python -m printobs.benchdecode")
+    parser.add_argument("-record", "--record", metavar='DIR',
+            help="store compressed raw responses and an index in DIR")
+    parser.add_argument("-replay", "--replay", metavar='DIR',
+            help="process recorded responses from DIR, no network")
+    parser.add_argument("-colloc", metavar='modelfile',
+            help="collocate observations with gridded model file (netcdf)")
+    parser.add_argument("-collocVar", metavar='collocVar',
+            help="model variables to collocate, comma separated (default: all)")
+    parser.add_argument("-collocTol", type=float, metavar='collocTol',
+            help="max time difference in minutes (default: 5)")
+    parser.add_argument("-inv", action='store_true',
+            help="print and cache inventory of available time series")
 
     args = parser.parse_args()
     dargs = vars(args)
@@ -76,53 +120,128 @@ def main():
     avVar = dargs.get('avVar', None)
     avMode = dargs.get('avMode', 'left')
     avWin = dargs.get('avWin', 6)
+    plot = dargs.get('plot')
+    plotdir = dargs.get('plotdir', '.')
+    nproc = dargs.get('nproc')
+    win = dargs.get('win')
+    record = dargs.get('record')
+    replay = dargs.get('replay')
+    colloc = dargs.get('colloc')
+    collocVar = dargs.get('collocVar')
+    collocTol = dargs.get('collocTol', 5)
+    inv = dargs.get('inv', False)
+
+    if w is not None and p is None:
+        parser.error('-w needs -p, the path to the target file')
+    if colloc is not None and v != 'v1':
+        parser.error('-colloc needs station locations of FROST API v1')
 
 # -------------------------------------------------------------------- #
     if s is None:
         # print available locations
         print_available_locations()
-    else:
+    elif inv is True:
+        from .inventory import update_inventory, print_inventory
         t1 = time.time()
-        # api call
-        r = call_frost_api(sd, ed, s, v)
-        print(r.url)
-        t2 = time.time()
-        print('time used for api call:', f'{t2-t1:.2f}', 'seconds')
-        # get additional info
-        if v == 'v1':
-            df, dinfo = get_frost_df(r, v)
-        else:
-            df = get_frost_df(r, v)
-        # info_lst = list(dinfo.keys())
-        # reorganize df
-        df = sort_df(df)
-        # format data for output
-        fdf = format_df(df)
-        # format info df
-        fdf_info = None
-        if w is None:
-            print_formatted(fdf, fdf_info)
-            if v == 'v1':
-                #print(format_info_df(df,fdf,dinfo,'sensor'))
-                print(format_info_df(df, fdf, dinfo, 'level'))
-                print(format_info_df(df, fdf, dinfo, 'parameterid'))
-            # print to screen
-            if v == 'v1':
-                print_info(r, s)
-            print('')
-            t3 = time.time()
-            print('time used:', f'{t3-t1:.2f}', 'seconds')
-        if avVar is not None:
-            from .utils import averager
-            import pandas as pd
-            l = list(df.keys())
-            varlst = [s for s in l if avVar in s]
-            df2 = df[['time']+varlst]
-            for var in varlst:
-                varmean = averager(var, df2[var].values, avWin, avMode)
-                with pd.option_context('mode.chained_assignment', None):
-                    df2[var] = varmean
-            fdf2 = format_df(df2)
-            print_formatted(fdf2, None)
-    if w is not None:
-        dump(df, p, w)
+        invs = update_inventory(sd, ed, s.split(','), v)
+        print_inventory(invs, sd, ed)
+        print('time used:', f'{time.time()-t1:.2f}', 'seconds')
+    else:
+        stations = s.split(',')
+        plot_jobs = []
+        colloc_obs = {}
+        fetched = None
+        if win is not None or len(stations) > 1 or replay is not None:
+            from .decode import fetch_decode
+            t0 = time.time()
+            fetched = fetch_decode(sd, ed, stations, v, win, nproc,
+                                   record, replay, colloc is not None)
+            print('time used for api calls and decoding:',
+                  f'{time.time()-t0:.2f}', 'seconds')
+        for s in stations:
+            t1 = time.time()
+            if fetched is not None:
+                if s not in fetched:
+                    continue
+                r, df, dinfo, loc = fetched[s]
+            else:
+                # api call
+                r = call_frost_api(sd, ed, s, v, record)
+                print(r.url)
+                t2 = time.time()
+                print('time used for api call:', f'{t2-t1:.2f}', 'seconds')
+                # get additional info
+                if v == 'v1':
+                    df, dinfo = get_frost_df(r, v)
+                else:
+                    df = get_frost_df(r, v)
+                if colloc is not None:
+                    loc = get_frost_location(r)
+            if len(df) == 0:
+                print('no observations found for', s)
+                continue
+            # info_lst = list(dinfo.keys())
+            # reorganize df
+            df = sort_df(df)
+            # format data for output
+            fdf = format_df(df)
+            # format info df
+            fdf_info = None
+            if w is None and plot is None and colloc is None:
+                print_formatted(fdf, fdf_info)
+                if v == 'v1':
+                    #print(format_info_df(df,fdf,dinfo,'sensor'))
+                    print(format_info_df(df, fdf, dinfo, 'level'))
+                    print(format_info_df(df, fdf, dinfo, 'parameterid'))
+                # print to screen
+                if v == 'v1':
+                    print_info(r, s)
+                print('')
+                t3 = time.time()
+                print('time used:', f'{t3-t1:.2f}', 'seconds')
+            if avVar is not None:
+                from .utils import averager
+                import pandas as pd
+                l = list(df.keys())
+                varlst = [s for s in l if avVar in s]
+                df2 = df[['time']+varlst]
+                for var in varlst:
+                    varmean = averager(var, df2[var].values, avWin, avMode)
+                    with pd.option_context('mode.chained_assignment', None):
+                        df2[var] = varmean
+                fdf2 = format_df(df2)
+                print_formatted(fdf2, None)
+            if colloc is not None:
+                colloc_obs[s] = (df, loc)
+            elif w is not None:
+                if len(stations) > 1:
+                    ptf = os.path.join(os.path.dirname(p),
+                                       s + '_' + os.path.basename(p))
+                else:
+                    ptf = p
+                dump(df, ptf, w)
+            if plot is not None:
+                ptf = os.path.join(plotdir, s + '_'
+                                   + sd.strftime('%Y%m%d%H%M') + '_'
+                                   + ed.strftime('%Y%m%d%H%M') + '.' + plot)
+                plot_jobs.append((df, ptf, s))
+        if colloc is not None and len(colloc_obs) == 0:
+            print('no observations to collocate')
+        elif colloc is not None:
+            from .collocation import collocate
+            t5 = time.time()
+            if collocVar is not None:
+                collocVar = collocVar.split(',')
+            cdf = collocate(colloc_obs, colloc, collocVar, collocTol)
+            print(cdf.groupby('station').size().to_string())
+            print('time used for collocation:',
+                  f'{time.time()-t5:.2f}', 'seconds')
+            if w is not None:
+                dump(cdf, p, w)
+        if plot is not None:
+            from .plotting import plot_batch
+            t4 = time.time()
+            for ptf in plot_batch(plot_jobs, nproc):
+                print('plot written to:', ptf)
+            print('time used for plotting:',
+                  f'{time.time()-t4:.2f}', 'seconds')
@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+import xarray as xr
+from scipy.spatial import cKDTree
+
+earth_radius = 6371.  # km
+
+lat_names = ['lat', 'latitude', 'nav_lat']
+lon_names = ['lon', 'longitude', 'nav_lon']
+time_names = ['time', 'valid_time']
+
+def _find_var(ds: 'xarray.Dataset', names: list, standard_name: str) -> str:
+    for name in ds.variables:
+        if ds[name].attrs.get('standard_name') == standard_name:
+            return name
+    for name in names:
+        if name in ds.variables:
+            return name
+    raise KeyError('no ' + standard_name + ' found in model file')
+
+def lonlat_to_xyz(lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    """
+    convert to cartesian coordinates on the unit sphere
+    """
+    lon = np.radians(lon)
+    lat = np.radians(lat)
+    return np.column_stack([np.cos(lat)*np.cos(lon),
+                            np.cos(lat)*np.sin(lon),
+                            np.sin(lat)])
+
+class ModelGrid:
+    """
+    spatial index of a gridded model file
+
+    The KD-tree is built once on the model grid and queried for all
+    stations and times at once. The file is opened lazily and only the
+    grid points and time steps needed are read.
+    """
+    def __init__(self, ptf: str):
+        self.ds = xr.open_dataset(ptf)
+        self.latn = _find_var(self.ds, lat_names, 'latitude')
+        self.lonn = _find_var(self.ds, lon_names, 'longitude')
+        self.timen = _find_var(self.ds, time_names, 'time')
+        lat = self.ds[self.latn]
+        lon = self.ds[self.lonn]
+        if lat.ndim == 1:
+            # regular grid
+            self.dims = (lat.dims[0], lon.dims[0])
+            lon2d, lat2d = np.meshgrid(lon.values, lat.values)
+        else:
+            self.dims = lat.dims
+            lon2d, lat2d = lon.values, lat.values
+        self.shape = lat2d.shape
+        self.tree = cKDTree(lonlat_to_xyz(lon2d.ravel(), lat2d.ravel()))
+        self.time = self.ds[self.timen].values.astype('datetime64[ns]')
+        self.tdim = self.ds[self.timen].dims[0]
+
+    def resolution(self) -> float:
+        """
+        median distance between neighbouring grid points in km
+        """
+        idx = np.linspace(0, self.tree.n-1, min(self.tree.n, 1000))
+        dist, _ = self.tree.query(self.tree.data[idx.astype(int)], k=2)
+        return np.median(dist[:, 1]) * earth_radius
+
+    def varlst(self) -> list:
+        """
+        model variables defined on time and grid
+        """
+        dims = {self.tdim, *self.dims}
+        return [vn for vn in self.ds.data_vars
+                if dims.issubset(self.ds[vn].dims)]
+
+    def query(self, lon: np.ndarray, lat: np.ndarray) -> tuple:
+        """
+        nearest grid point (iy, ix) and distance in km
+        """
+        dist, idx = self.tree.query(lonlat_to_xyz(lon, lat))
+        iy, ix = np.unravel_index(idx, self.shape)
+        return iy, ix, dist * earth_radius
+
+    def match_time(self, t: np.ndarray, tol: np.timedelta64) -> tuple:
+        """
+        nearest model time index and mask of matches within tol
+        """
+        if len(self.time) == 1:
+            idx = np.zeros(len(t), dtype=int)
+        else:
+            idx = np.clip(np.searchsorted(self.time, t),
+                          1, len(self.time)-1)
+            left = self.time[idx-1]
+            idx = np.where(t - left <= self.time[idx] - t, idx-1, idx)
+        return idx, np.abs(self.time[idx] - t) <= tol
+
+    def extract(self, vn: str, it: np.ndarray, iy: np.ndarray,
+        ix: np.ndarray, chunk: int = 24) -> np.ndarray:
+        """
+        read model values at points (it, iy, ix), chunk time steps at
+        a time and only the grid rows and columns needed
+        """
+        var = self.ds[vn]
+        # first element of any other dimension, e.g. depth or member
+        extra = {d: 0 for d in var.dims
+                 if d not in (self.tdim, *self.dims)}
+        var = var.isel(extra).transpose(self.tdim, *self.dims)
+        out = np.full(len(it), np.nan)
+        uy, iiy = np.unique(iy, return_inverse=True)
+        ux, iix = np.unique(ix, return_inverse=True)
+        ut = np.unique(it)
+        order = np.argsort(it, kind='stable')
+        its = it[order]
+        for n in range(0, len(ut), chunk):
+            tc = ut[n:n+chunk]
+            sel = order[np.searchsorted(its, tc[0], 'left'):
+                        np.searchsorted(its, tc[-1], 'right')]
+            block = var.isel({self.tdim: tc,
+                              self.dims[0]: uy,
+                              self.dims[1]: ux}).values
+            out[sel] = block[np.searchsorted(tc, it[sel]),
+                             iiy[sel], iix[sel]]
+        return out
+
+def _parse_time(t: 'pandas.core.series.Series') -> np.ndarray:
+    return pd.to_datetime(t, utc=True).dt.tz_localize(None)\
+            .values.astype('datetime64[ns]')
+
+def make_points(obs: dict, loc_tol: float = 10)\
+    -> 'pandas.core.frame.DataFrame':
+    """
+    combine observations of all stations with their location
+
+    Args:
+        obs (dict): {station: (df, loc)} with df from get_frost_df and
+                    loc from get_frost_location
+        loc_tol (float): max time difference in minutes between an
+                         observation and the position of a moving
+                         platform
+
+    Returns:
+        pandas.core.frame.DataFrame one row per station and time
+    """
+    plst = []
+    for s in obs:
+        df, loc = obs[s]
+        if loc['time'].isnull().all():
+            # static platform
+            p = df.assign(lat=loc['lat'].values[-1],
+                          lon=loc['lon'].values[-1])
+        else:
+            # join on parsed times as the string formats may differ
+            p = df.assign(ptime=_parse_time(df['time']))\
+                  .sort_values('ptime', kind='stable')
+            l = loc.assign(ptime=_parse_time(loc['time']))\
+                   .drop(columns='time').dropna(subset=['ptime'])\
+                   .sort_values('ptime', kind='stable')
+            p = pd.merge_asof(p, l, on='ptime', direction='nearest',
+                    tolerance=pd.Timedelta(minutes=loc_tol))\
+                  .drop(columns='ptime')
+        p.insert(0, 'station', s)
+        plst.append(p)
+    return pd.concat(plst, ignore_index=True)
+
+def collocate(
+    obs: dict, ptf: str, varlst: list = None,
+    time_tol: float = 5, max_dist: float = None,
+    chunk: int = 24) -> 'pandas.core.frame.DataFrame':
+    """
+    collocate observations of many stations with a gridded model file
+    in one pass
+
+    Args:
+        obs (dict): {station: (df, loc)}, see make_points
+        ptf (str): path to model file
+        varlst (list): model variables, default all on the grid
+        time_tol (float): max time difference in minutes
+        max_dist (float): max distance to grid point in km,
+                          default twice the grid resolution
+        chunk (int): number of model time steps read at once
+
+    Returns:
+        pandas.core.frame.DataFrame of observations with model values
+    """
+    grid = ModelGrid(ptf)
+    if varlst is None:
+        varlst = grid.varlst()
+    if max_dist is None:
+        max_dist = 2 * grid.resolution()
+    points = make_points(obs)
+    t = _parse_time(points['time'])
+    it, tmask = grid.match_time(t, np.timedelta64(int(time_tol*60), 's'))
+    smask = ~(np.isnan(points['lat'].values)
+              | np.isnan(points['lon'].values))
+    iy = np.zeros(len(points), dtype=int)
+    ix = np.zeros(len(points), dtype=int)
+    dist = np.full(len(points), np.nan)
+    iy[smask], ix[smask], dist[smask] = grid.query(
+            points['lon'].values[smask], points['lat'].values[smask])
+    mask = tmask & smask & (dist <= max_dist)
+    points = points[mask].reset_index(drop=True)
+    it, iy, ix = it[mask], iy[mask], ix[mask]
+    points['model_time'] = pd.to_datetime(grid.time[it])\
+                            .strftime('%Y-%m-%dT%H:%M:%SZ')
+    points['dist'] = dist[mask]
+    for vn in varlst:
+        points['model_' + vn] = grid.extract(vn, it, iy, ix, chunk)
+    grid.ds.close()
+    return points
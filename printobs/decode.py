@@ -0,0 +1,198 @@
+import json
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from .utils import call_frost_api, decode_frost_df, make_time_windows
+from .utils import parse_date, replay_frost_api, decode_frost_location
+from .inventory import get_inventory, plan_time_windows
+
+def _to_shared(df: 'pandas.core.frame.DataFrame') -> tuple:
+    """
+    copy data columns and time into one shared memory block, the data
+    as float64 rows followed by the time strings as fixed width bytes,
+    such that the time keeps the original frost format
+    """
+    cols = [k for k in df.keys() if k != 'time']
+    n = len(df)
+    if n == 0:
+        return None, n, cols, 0
+    t = df['time'].values.astype(str).astype('S')
+    width = t.dtype.itemsize
+    offset = 8*n*len(cols)
+    shm = shared_memory.SharedMemory(create=True, size=offset + n*width)
+    buf = np.ndarray((len(cols), n), dtype='float64', buffer=shm.buf)
+    for i, col in enumerate(cols):
+        buf[i] = pd.to_numeric(df[col], errors='coerce').values
+    tbuf = np.ndarray((n,), dtype=t.dtype, buffer=shm.buf, offset=offset)
+    tbuf[:] = t
+    name = shm.name
+    del buf, tbuf
+    shm.close()
+    return name, n, cols, width
+
+def _from_shared(name: str, n: int, cols: list, width: int)\
+    -> 'pandas.core.frame.DataFrame':
+    """
+    rebuild dataframe from shared memory block and release the block
+    """
+    if name is None:
+        return pd.DataFrame(columns=['time']+cols)
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        offset = 8*n*len(cols)
+        buf = np.ndarray((len(cols), n), dtype='float64', buffer=shm.buf)
+        tbuf = np.ndarray((n,), dtype='S' + str(width), buffer=shm.buf,
+                          offset=offset)
+        values = buf.copy()
+        t = tbuf.astype(str)
+        del buf, tbuf
+    finally:
+        shm.close()
+        shm.unlink()
+    df = pd.DataFrame(values.T, columns=cols)
+    df.insert(0, 'time', t)
+    return df
+
+def _decode_worker(content: bytes, v: str, with_location: bool) -> tuple:
+    """
+    decode raw frost response in worker process, the station
+    location only if with_location
+    """
+    data = json.loads(content)
+    loc = None
+    if v == 'v1':
+        df, dinfo = decode_frost_df(data, v)
+        if with_location:
+            loc = decode_frost_location(data).to_records(index=False)
+    else:
+        df, dinfo = decode_frost_df(data, v), None
+    return _to_shared(df) + (dinfo, loc)
+
+def _collect(future) -> tuple:
+    name, n, cols, width, dinfo, loc = future.result()
+    if loc is not None:
+        loc = pd.DataFrame(loc)
+    return _from_shared(name, n, cols, width), dinfo, loc
+
+def _make_pool(nproc: int = None) -> ProcessPoolExecutor:
+    # share one tracker with the workers, such that blocks
+    # created there are released by unlink in the parent
+    resource_tracker.ensure_running()
+    return ProcessPoolExecutor(nproc)
+
+def merge_frost_dfs(results: list) -> tuple:
+    """
+    merge (df, dinfo, loc) of consecutive time windows
+    """
+    df = pd.concat([r[0] for r in results], ignore_index=True)
+    df = df.drop_duplicates(subset='time', keep='first')\
+            .reset_index(drop=True)
+    loc = None
+    locs = [r[2] for r in results if r[2] is not None]
+    if len(locs) > 0:
+        loc = pd.concat(locs, ignore_index=True)\
+                .drop_duplicates(subset='time', keep='last')\
+                .reset_index(drop=True)
+    dinfo = None
+    for _, di, _ in results:
+        if di is None:
+            continue
+        if dinfo is None:
+            dinfo = {k: {} for k in di}
+        for k in di:
+            dinfo[k].update(di[k])
+    return df, dinfo, loc
+
+def decode_parallel(
+    contents: list, v: str, nproc: int = None,
+    with_location: bool = False) -> list:
+    """
+    decode raw frost response bodies in a process pool, with the
+    station location if with_location (v1)
+
+    Returns:
+        list of (df, dinfo, loc) in the order of contents
+    """
+    with _make_pool(nproc) as pool:
+        futures = [pool.submit(_decode_worker, c, v, with_location)
+                   for c in contents]
+        return [_collect(f) for f in futures]
+
+def get_time_windows(
+    sdate: 'datetime', edate: 'datetime', nID: str, win: str = None)\
+    -> list:
+    """
+    time windows to be downloaded for a station, planned with the
+    cached inventory if available
+    """
+    if win is None:
+        return [(sdate, edate)]
+    inv = get_inventory(nID)
+    if inv is not None:
+        freq = None if win == 'auto' else win
+        return plan_time_windows(sdate, edate, inv, freq)
+    if win == 'auto':
+        print('no inventory for', nID, 'using monthly windows')
+        win = 'MS'
+    return make_time_windows(sdate, edate, win)
+
+def fetch_decode(
+    sdate: 'datetime', edate: 'datetime', stations: list, v: str,
+    win: str = None, nproc: int = None,
+    record: str = None, replay: str = None,
+    with_location: bool = False) -> dict:
+    """
+    download all stations and time windows and decode them in a
+    process pool while the following downloads are running
+
+    Args:
+        sdate (datetime): start date
+        edate (datetime): end date
+        stations (list): station names
+        v (str): FROST API version
+        win (str): window length as pandas frequency e.g. MS, 7D,
+                   or auto to size windows by expected volume; windows
+                   without data are skipped for inventoried stations
+        nproc (int): number of worker processes
+        record (str): directory to store raw responses in
+        replay (str): directory with recorded responses to be used
+                      in lieu of frost, win is ignored then
+        with_location (bool): also decode the station location (v1),
+                              needed for collocation only
+
+    Returns:
+        dict {station: (r, df, dinfo, loc)} with the last response r,
+        loc is None without with_location
+    """
+    sdate = parse_date(sdate)
+    edate = parse_date(edate)
+    futures = {s: [] for s in stations}
+    responses = {}
+    with _make_pool(nproc) as pool:
+        for s in stations:
+            if replay is not None:
+                rlst = replay_frost_api(sdate, edate, s, v, replay)
+            else:
+                windows = get_time_windows(sdate, edate, s, win)
+                rlst = (call_frost_api(sd, ed, s, v, record)
+                        for sd, ed in windows)
+            for r in rlst:
+                if r is None:
+                    continue
+                print(r.url)
+                futures[s].append(pool.submit(
+                        _decode_worker, r.content, v, with_location))
+                responses[s] = r
+        fetched = {}
+        for s in stations:
+            if len(futures[s]) == 0:
+                print('no data retrieved for', s)
+                continue
+            df, dinfo, loc = merge_frost_dfs([_collect(f) for f in futures[s]])
+            if replay is not None:
+                # recorded windows may exceed the requested period
+                t = pd.to_datetime(df['time'], utc=True).dt.tz_localize(None)
+                df = df[(t >= sdate) & (t <= edate)].reset_index(drop=True)
+            fetched[s] = (responses[s], df, dinfo, loc)
+    return fetched
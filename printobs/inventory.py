@@ -0,0 +1,189 @@
+import os
+import json
+from datetime import datetime, timedelta
+import pandas as pd
+from .utils import call_frost_api, parse_date, make_time_windows
+from .utils import varstr_dict
+
+inventory_cache = os.path.join(os.path.expanduser('~'),
+                               '.cache', 'printobs', 'inventory.json')
+
+# assumed time resolution of the observations to estimate volumes
+obs_resolution = timedelta(minutes=10)
+
+def decode_frost_inventory(data: dict)\
+    -> 'pandas.core.frame.DataFrame':
+    """
+    availability of each time series from parsed frost json for v1,
+    a missing end of availability means the series is still active
+    """
+    cols = ['element', 'alias', 'sensor', 'level', 'parameterid',
+            'from', 'to']
+    tseries = data['data']['tseries']
+    if len(tseries) == 0:
+        return pd.DataFrame(columns=cols)
+    df = pd.json_normalize([ts['header'] for ts in tseries])
+    inv = pd.DataFrame({
+            'element': df['extra.element.id'],
+            'sensor': df['id.sensor'],
+            'level': df['id.level'],
+            'parameterid': df['id.parameterid'],
+            'from': df.get('available.from'),
+            'to': df.get('available.to')})
+    inv = inv[inv['element'].isin(list(varstr_dict))]
+    inv['alias'] = [varstr_dict[e]['alias'] for e in inv['element']]
+    inv = inv.astype({'from': object, 'to': object})
+    inv = inv.where(inv.notnull(), None)
+    return inv[cols].sort_values(['element', 'sensor', 'level'])\
+                    .reset_index(drop=True)
+
+def load_inventory(cache: str = inventory_cache) -> dict:
+    """
+    read cached availability index {station: {...}}
+    """
+    if not os.path.isfile(cache):
+        return {}
+    with open(cache) as f:
+        return json.load(f)
+
+def get_inventory(nID: str, cache: str = inventory_cache)\
+    -> 'pandas.core.frame.DataFrame':
+    """
+    cached availability of a station, None if not inventoried
+    """
+    entry = load_inventory(cache).get(nID)
+    if entry is None:
+        return None
+    inv = pd.DataFrame(entry['series'],
+                       columns=['element', 'alias', 'sensor', 'level',
+                                'parameterid', 'from', 'to'])
+    inv.attrs['sdate'] = parse_date(entry['sdate'])
+    inv.attrs['edate'] = parse_date(entry['edate'])
+    return inv
+
+def update_inventory(
+    sdate: datetime, edate: datetime, stations: list, v: str = 'v1',
+    cache: str = inventory_cache) -> dict:
+    """
+    fetch time series headers only (no observations) and update
+    the cached availability index
+
+    Returns:
+        dict {station: inventory dataframe}
+    """
+    if v != 'v1':
+        print('inventory is only available for FROST API v1')
+        return {}
+    sdate = parse_date(sdate)
+    edate = parse_date(edate)
+    index = load_inventory(cache)
+    invs = {}
+    for s in stations:
+        r = call_frost_api(sdate, edate, s, v, incobs=False)
+        if r is None:
+            continue
+        inv = decode_frost_inventory(r.json())
+        index[s] = {'updated': datetime.now().isoformat(),
+                    'sdate': sdate.isoformat(),
+                    'edate': edate.isoformat(),
+                    'series': inv.to_dict('records')}
+        inv.attrs['sdate'] = sdate
+        inv.attrs['edate'] = edate
+        invs[s] = inv
+    os.makedirs(os.path.dirname(cache), exist_ok=True)
+    with open(cache, 'w') as f:
+        json.dump(index, f, indent=1, default=str)
+    return invs
+
+def _active(inv: 'pandas.core.frame.DataFrame',
+    sdate: datetime, edate: datetime) -> 'pandas.core.series.Series':
+    """
+    mask of series with data between sdate and edate
+    """
+    start = pd.to_datetime(inv['from'], utc=True).dt.tz_localize(None)
+    end = pd.to_datetime(inv['to'], utc=True).dt.tz_localize(None)
+    return ((start.isnull() | (start < edate))
+            & (end.isnull() | (end > sdate)))
+
+def plan_time_windows(
+    sdate: datetime, edate: datetime,
+    inv: 'pandas.core.frame.DataFrame', freq: str = None,
+    max_obs: int = 200000, step: str = 'D') -> list:
+    """
+    time windows for chunked downloads based on the inventory
+
+    Windows without any available series are skipped. With freq
+    given the windows are made with make_time_windows, otherwise
+    consecutive steps are joined as long as the expected number of
+    observations (active series x duration / obs_resolution) stays
+    below max_obs. Time outside the inventoried period is split into
+    windows of freq or calendar months.
+    """
+    sdate = parse_date(sdate)
+    edate = parse_date(edate)
+    isdate = max(sdate, inv.attrs['sdate'])
+    iedate = min(edate, inv.attrs['edate'])
+    planned = []
+    if sdate < min(inv.attrs['sdate'], edate):
+        planned += make_time_windows(sdate, min(inv.attrs['sdate'], edate),
+                                     freq or 'MS')
+    inside = []
+    if isdate < iedate:
+        inside = make_time_windows(isdate, iedate, freq or step)
+    volume = max_obs
+    for sd, ed in inside:
+        nseries = _active(inv, sd, ed).sum()
+        if nseries == 0:
+            # empty range, also ends the current window
+            volume = max_obs
+            continue
+        if freq is not None:
+            planned.append((sd, ed))
+            continue
+        expected = nseries * ((ed - sd) / obs_resolution)
+        if volume + expected <= max_obs:
+            planned[-1] = (planned[-1][0], ed)
+            volume += expected
+        else:
+            planned.append((sd, ed))
+            volume = expected
+    if max(inv.attrs['edate'], sdate) < edate:
+        planned += make_time_windows(max(inv.attrs['edate'], sdate), edate,
+                                     freq or 'MS')
+    return planned
+
+def format_inventory(
+    inv: 'pandas.core.frame.DataFrame',
+    sdate: datetime, edate: datetime) -> str:
+    """
+    coverage table with one character per month,
+    # if the series has data and . if not
+    """
+    months = make_time_windows(sdate, edate, 'MS')
+    fdf = inv[['alias', 'sensor', 'level', 'parameterid']].copy()
+    fdf['from'] = [str(t)[:10] if t is not None else ''
+                   for t in inv['from']]
+    fdf['to'] = [str(t)[:10] if t is not None else ''
+                 for t in inv['to']]
+    coverage = pd.DataFrame({m: _active(inv, sd, ed)
+                             for m, (sd, ed) in enumerate(months)})
+    fdf['coverage'] = [''.join('#' if c else '.' for c in row)
+                       for row in coverage.values]
+    return fdf.to_string(index=False)
+
+def print_inventory(invs: dict, sdate: datetime, edate: datetime):
+    """
+    print coverage table of inventoried stations
+    """
+    sdate = parse_date(sdate)
+    edate = parse_date(edate)
+    for s in invs:
+        print('')
+        print('--> ', s, ' <--')
+        print('coverage from', sdate.strftime('%Y-%m'),
+              'to', edate.strftime('%Y-%m'), '(one character per month)')
+        if len(invs[s]) == 0:
+            print('no time series available')
+        else:
+            print(format_inventory(invs[s], sdate, edate))
+    print('')
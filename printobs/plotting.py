@@ -0,0 +1,118 @@
+import os
+import matplotlib
+# headless backend, also inherited by batch workers
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from multiprocessing import Pool
+from .utils import varstr_dict
+
+def minmax_decimate(x: np.ndarray, y: np.ndarray, nbins: int) -> tuple:
+    """
+    visually lossless decimation of a time series
+
+    The x-range is split into nbins (ideally one per pixel) and only the
+    minimum and maximum of each bin are kept in original order. Empty
+    bins are marked with NaN such that data gaps are not bridged.
+
+    Args:
+        x (numpy.ndarray): sorted time axis (datetime64 or numeric)
+        y (numpy.ndarray): values
+        nbins (int): number of bins
+
+    Returns:
+        tuple (x (numpy.ndarray), y (numpy.ndarray)): decimated series
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    if len(y) <= 2*nbins:
+        # short series as is, NaNs break the line at gaps
+        return x, y
+    valid = ~np.isnan(y)
+    if valid.sum() <= 2*nbins:
+        return x, y
+    x, y = x[valid], y[valid]
+    xi = x.astype('int64').astype(float)
+    span = xi[-1] - xi[0]
+    if span <= 0:
+        return x, y
+    bins = ((xi - xi[0]) / span * nbins).astype(int)
+    bins = np.clip(bins, 0, nbins-1)
+    # sorted by bin and value: first is bin min, last is bin max
+    order = np.lexsort((y, bins))
+    sbins = bins[order]
+    change = sbins[1:] != sbins[:-1]
+    first = np.r_[True, change]
+    last = np.r_[change, True]
+    keep = np.unique(np.concatenate([order[first], order[last]]))
+    x, y, kbins = x[keep], y[keep], bins[keep]
+    # break line where bins are empty
+    gaps = np.where(np.diff(kbins) > 1)[0] + 1
+    if len(gaps) > 0:
+        x = np.insert(x, gaps, x[gaps])
+        y = np.insert(y, gaps, np.nan)
+    return x, y
+
+def group_columns(df: 'pandas.core.frame.DataFrame') -> dict:
+    """
+    group data columns by variable alias in order of variable_def.yaml
+    """
+    groups = {}
+    for vn in varstr_dict:
+        alias = varstr_dict[vn]['alias']
+        cols = [k for k in df.keys()
+                if isinstance(k, str) and k.rsplit('_', 1)[0] == alias]
+        if len(cols) > 0:
+            groups[alias] = cols
+    return groups
+
+def plot_df(df: 'pandas.core.frame.DataFrame', ptf: str,
+    title: str = None, width: float = 12, dpi: int = 100) -> str:
+    """
+    render one panel per variable with one line per sensor to file,
+    the format (png, svg, ...) is given by the file extension of ptf
+    """
+    groups = group_columns(df)
+    t = pd.to_datetime(df['time'], utc=True).dt.tz_localize(None).values
+    nrows = max(len(groups), 1)
+    fig, axs = plt.subplots(nrows, 1, sharex=True, squeeze=False,
+                            figsize=(width, 2.2*nrows), dpi=dpi)
+    axs = axs[:, 0]
+    # one bin per pixel of the axes width
+    nbins = max(int(axs[0].bbox.width), 1)
+    for ax, alias in zip(axs, groups):
+        for col in groups[alias]:
+            x, y = minmax_decimate(t, df[col].values, nbins)
+            if '_' in col:
+                label = 'sensor ' + col.rsplit('_', 1)[1]
+            else:
+                # v0 has no sensor suffix
+                label = col
+            ax.plot(x, y, lw=.8, label=label)
+        ax.set_ylabel(alias)
+        ax.grid(True, lw=.3)
+        ax.legend(loc='upper left', fontsize='small', frameon=False)
+    if title is not None:
+        axs[0].set_title(title)
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    fig.savefig(ptf)
+    plt.close(fig)
+    return ptf
+
+def _plot_job(job: tuple) -> str:
+    df, ptf, title = job
+    return plot_df(df, ptf, title=title)
+
+def plot_batch(jobs: list, nproc: int = None) -> list:
+    """
+    render many (df, ptf, title) jobs in a worker pool
+    """
+    if len(jobs) == 0:
+        return []
+    if len(jobs) == 1 or nproc == 1:
+        return [_plot_job(job) for job in jobs]
+    nproc = min(nproc or os.cpu_count(), len(jobs))
+    with Pool(nproc) as pool:
+        return pool.map(_plot_job, jobs)
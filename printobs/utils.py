@@ -9,6 +9,7 @@ import numpy as np
 from pkg_resources import resource_stream
 import xarray as xr
 import json
+import gzip
 from math import floor
 import sys
 import scipy as sp
@@ -46,11 +47,28 @@ def make_frost_reference_time_period(\
                             edate.strftime(formatstr))
     return refstr
 
+def make_time_windows(\
+    sdate: datetime, edate: datetime, freq: str) -> list:
+    """
+    split time period into consecutive windows, e.g. freq='MS' for
+    calendar months, as FROST cannot handle large data requests
+    """
+    sdate = parse_date(sdate)
+    edate = parse_date(edate)
+    edges = [e.to_pydatetime()
+             for e in pd.date_range(sdate, edate, freq=freq)
+             if sdate < e < edate]
+    edges = [sdate] + edges + [edate]
+    return list(zip(edges[:-1], edges[1:]))
+
 def call_frost_api(\
     sdate: datetime, edate: datetime,\
-    nID: str, v: str) -> 'requests.models.Response':
+    nID: str, v: str, record: str = None, incobs: bool = True)\
+    -> 'requests.models.Response':
     """
-    make frost api call
+    make frost api call, the raw response is stored in the
+    directory record if given, with incobs=False only the
+    time series headers are retrieved (v1)
     """
     varstr_lst = list(varstr_dict.keys())
     varstr = ','.join(varstr_lst)
@@ -70,9 +88,11 @@ def call_frost_api(\
     elif v == 'v1':
         r = call_frost_api_v1(nID, varstr,
                                 frost_reference_time,
-                                client_id, client_secret)
+                                client_id, client_secret, incobs)
         print('r.status_code:',r.status_code)
     if r.status_code == 200:
+        if record is not None:
+            record_frost_response(r, record, nID, sdate, edate, v)
         return r
     else:
         try:
@@ -80,6 +100,80 @@ def call_frost_api(\
         except requests.exceptions.JSONDecodeError:
             print(r.status_code, r.text)
 
+class FrostRecord:
+    """
+    recorded frost response, stands in for requests.models.Response
+    """
+    status_code = 200
+
+    def __init__(self, content: bytes, url: str):
+        self.content = content
+        self.url = url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode()
+
+    def json(self) -> dict:
+        return json.loads(self.content)
+
+def load_record_index(rdir: str) -> dict:
+    """
+    read index of recorded responses {station: [entries]}
+    """
+    ptf = os.path.join(rdir, 'index.json')
+    if not os.path.isfile(ptf):
+        return {}
+    with open(ptf) as f:
+        return json.load(f)
+
+def record_frost_response(\
+    r: 'requests.models.Response', rdir: str,\
+    nID: str, sdate: datetime, edate: datetime, v: str):
+    """
+    store raw response body compressed and add it to the index,
+    only the body and the url are stored, no credentials
+    """
+    sdate = parse_date(sdate)
+    edate = parse_date(edate)
+    formatstr = '%Y%m%dT%H%M'
+    fname = os.path.join(nID, '{}_{}_{}.json.gz'.format(
+                v, sdate.strftime(formatstr), edate.strftime(formatstr)))
+    os.makedirs(os.path.join(rdir, nID), exist_ok=True)
+    with gzip.open(os.path.join(rdir, fname), 'wb', compresslevel=6) as f:
+        f.write(r.content)
+    index = load_record_index(rdir)
+    entry = {'v': v,
+             'sdate': sdate.isoformat(),
+             'edate': edate.isoformat(),
+             'file': fname,
+             'url': r.url}
+    entries = [e for e in index.get(nID, []) if e['file'] != fname]
+    index[nID] = sorted(entries + [entry], key=lambda e: e['sdate'])
+    with open(os.path.join(rdir, 'index.json'), 'w') as f:
+        json.dump(index, f, indent=1)
+
+def replay_frost_api(\
+    sdate: datetime, edate: datetime,\
+    nID: str, v: str, rdir: str) -> list:
+    """
+    load recorded responses overlapping the given time period
+    instead of calling frost
+    """
+    sdate = parse_date(sdate)
+    edate = parse_date(edate)
+    rlst = []
+    for e in load_record_index(rdir).get(nID, []):
+        if e['v'] != v:
+            continue
+        if parse_date(e['edate']) < sdate or parse_date(e['sdate']) > edate:
+            continue
+        with gzip.open(os.path.join(rdir, e['file']), 'rb') as f:
+            rlst.append(FrostRecord(f.read(), e['url']))
+    if len(rlst) == 0:
+        print('No recorded responses for', nID, 'in', rdir)
+    return rlst
+
 def call_frost_api_v0(\
     nID: str, varstr: str,frost_reference_time: str, client_id: str)\
     -> 'requests.models.Response':
@@ -103,7 +197,7 @@ def get_typeid(insitu_dict: dict, s: str) -> str:
 
 def call_frost_api_v1(\
     nID: str, varstr: str,frost_reference_time: str,\
-    client_id: str, client_secret: str)\
+    client_id: str, client_secret: str, incobs: bool = True)\
     -> 'requests.models.Response':
     """
     frost call, retrieve data from frost v1
@@ -123,7 +217,7 @@ def call_frost_api_v1(\
                 'elementids': varstr,
                 'time': frost_reference_time,
                 'levels': 'all',
-                'incobs': 'true',
+                'incobs': str(incobs).lower(),
                 'sensors': '0,1,2,3,4,5,6',
                 #'typeids': '22,11,510'
                 # 'typeids': str(get_typeid(insitu_dict, nID))
@@ -157,19 +251,33 @@ def get_frost_df(r: 'requests.models.Response',v: str)\
     """
     retrieve frost data as pandas dataframe
     """
+    return decode_frost_df(r.json(), v)
+
+def decode_frost_df(data: dict, v: str)\
+    -> 'pandas.core.frame.DataFrame':
+    """
+    create pandas dataframe from parsed frost json
+    """
     if v == 'v0':
-        return get_frost_df_v0(r)
+        return decode_frost_df_v0(data)
     elif v == 'v1':
-        return get_frost_df_v1(r)
+        return decode_frost_df_v1(data)
 
 def get_frost_df_v0(r: 'requests.models.Response')\
     -> 'pandas.core.frame.DataFrame':
     """
     create pandas dataframe from frost call for v0
     """
+    return decode_frost_df_v0(r.json())
+
+def decode_frost_df_v0(data: dict)\
+    -> 'pandas.core.frame.DataFrame':
+    """
+    create pandas dataframe from parsed frost json for v0
+    """
     varstr_lst = list(varstr_dict.keys())
     alias_lst = [varstr_dict[e]['alias'] for e in varstr_dict]
-    df = pd.json_normalize(r.json()['data'],
+    df = pd.json_normalize(data['data'],
                             ['observations'],
                             ['referenceTime'])
     df2 = df['referenceTime'].drop_duplicates().reset_index(drop=True)
@@ -187,10 +295,25 @@ def get_frost_df_v1(r: 'requests.models.Response')\
     """
     create pandas dataframe from frost call for v1
     """
+    return decode_frost_df_v1(r.json())
+
+def decode_frost_df_v1(data: dict)\
+    -> 'pandas.core.frame.DataFrame':
+    """
+    create pandas dataframe from parsed frost json for v1
+    """
+    tseries = data['data']['tseries']
+    dinfo = {'sensor':{},'level':{},'parameterid':{},
+             'geometric height':{},'masl':{}}
+    # number of observations per series, headers may come without
+    nobs = np.array([len(ts.get('observations', [])) for ts in tseries])
+    if len(tseries) == 0 or nobs.max() == 0:
+        print('no time series found')
+        return pd.DataFrame(columns=['time']), dinfo
     # empy sensor id lst
     sensor_id_lst = []
     # base df
-    df = pd.json_normalize(r.json()['data']['tseries'])
+    df = pd.json_normalize(tseries)
     # df to be concatenated initialized with time
     """
     # location for stationary
@@ -200,21 +323,16 @@ def get_frost_df_v1(r: 'requests.models.Response')\
     """
     # select time index, some ts have less than others
     # choose the one with most values
-    no_of_ts = len(pd.json_normalize(r.json()['data']['tseries'][:]))
-    no_of_ts = min(4,no_of_ts)
-    lenlst = []
-    for t in range(no_of_ts):
-        lenlst.append( len(pd.json_normalize(r.json()\
-                       ['data']['tseries'][t]['observations'])['time'].\
-                              to_frame()) )
-    time_idx = lenlst.index(max(lenlst))
-    dfc = pd.json_normalize(r.json()
-      ['data']['tseries'][time_idx]['observations'])['time'].to_frame()
-    dinfo = {'sensor':{},'level':{},'parameterid':{},
-             'geometric height':{},'masl':{}}
+    # among the first 4 series with observations
+    candidates = np.where(nobs > 0)[0][:4]
+    time_idx = candidates[np.argmax(nobs[candidates])]
+    dfc = pd.json_normalize(
+            tseries[time_idx]['observations'])['time'].to_frame()
     for vn in varstr_dict:
         idx = np.array(df['header.extra.element.id']\
                 [df['header.extra.element.id']==vn].index.to_list())
+        # skip series without observations
+        idx = np.array([i for i in idx if nobs[i] > 0], dtype=int)
         ###
         # key variables for frost:
         #print(df['header.extra.element.id'][idx])
@@ -251,8 +369,8 @@ def get_frost_df_v1(r: 'requests.models.Response')\
                 parameterids = df['header.id.parameterid'][idx].values
                 levels = df['header.id.level'][idx].values
         for n,i in enumerate(idx):
-            dftmp = pd.json_normalize(r.json()\
-                        ['data']['tseries'][i]['observations'])\
+            dftmp = pd.json_normalize(
+                        tseries[i]['observations'])\
                         ['body.value'].to_frame()
             vns = varstr_dict[vn]['alias'] + '_' \
                         + str(df['header.id.sensor'][i])
@@ -502,6 +620,40 @@ def print_info(r: 'requests.models.Response',nID: str = None):
                 "Location (i.e. sensor #0): {:.2f}E".format(lon) \
               + " {:.2f}N".format(lat) )
 
+def get_frost_location(r: 'requests.models.Response')\
+    -> 'pandas.core.frame.DataFrame':
+    """
+    retrieve station location from frost call for v1
+    """
+    return decode_frost_location(r.json())
+
+def decode_frost_location(data: dict)\
+    -> 'pandas.core.frame.DataFrame':
+    """
+    station location from parsed frost json for v1, one row per
+    observation time if moving and a single row without time if static
+    """
+    tseries = data['data']['tseries']
+    # first series with observations
+    tseries = [ts for ts in tseries if len(ts.get('observations', [])) > 0]
+    if len(tseries) == 0:
+        return pd.DataFrame(columns=['time', 'lat', 'lon'])
+    dfo = pd.json_normalize(tseries[0]['observations'])
+    if 'body.lat' in dfo.keys():
+        # location of moving platform
+        loc = dfo[['time', 'body.lat', 'body.lon']].rename(
+                columns={'body.lat': 'lat', 'body.lon': 'lon'})
+    else:
+        # location of static platform, i.e. sensor #0
+        location = tseries[0]['header']['extra']['station']\
+                    ['location'][0]['value']
+        loc = pd.DataFrame({'time': [None],
+                            'lat': [location['latitude']],
+                            'lon': [location['longitude']]})
+    loc['lat'] = loc['lat'].astype(float)
+    loc['lon'] = loc['lon'].astype(float)
+    return loc
+
 def print_available_locations():
     """
     print available offshore locations
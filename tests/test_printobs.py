@@ -12,3 +12,200 @@ def test_call_frost_api():
                         nID='draugen',v='v0')
     print(vars(r.status_code).keys())
     assert r.status_code == 200
+
+def test_minmax_decimate():
+    import numpy as np
+    from printobs.plotting import minmax_decimate
+    x = np.arange(100000)
+    y = np.sin(x/1000.)
+    y[50000:60000] = np.nan
+    xd, yd = minmax_decimate(x, y, 500)
+    assert len(xd) <= 2*500 + 500
+    assert np.nanmax(yd) == np.nanmax(y)
+    assert np.nanmin(yd) == np.nanmin(y)
+    # gap is not bridged
+    assert np.isnan(yd).any()
+    # short series are returned as is, gaps included
+    y = np.arange(10.)
+    y[3:6] = np.nan
+    xd, yd = minmax_decimate(np.arange(10), y, 100)
+    np.testing.assert_array_equal(yd, y)
+    # few valid values in a long series, gaps included
+    y = np.full(1000, np.nan)
+    y[:50] = 1.
+    y[-50:] = 2.
+    xd, yd = minmax_decimate(np.arange(1000), y, 100)
+    assert np.isnan(yd).any()
+
+def test_make_time_windows():
+    from printobs.utils import make_time_windows
+    windows = make_time_windows(datetime(2022,1,15), datetime(2022,4,1), 'MS')
+    assert windows[0] == (datetime(2022,1,15), datetime(2022,2,1))
+    assert windows[-1] == (datetime(2022,3,1), datetime(2022,4,1))
+    assert len(windows) == 3
+
+def test_shared_roundtrip():
+    import numpy as np
+    import pandas as pd
+    from printobs.decode import _to_shared, _from_shared
+    # time keeps the original frost format
+    df = pd.DataFrame({'time': ['2022-01-01T00:00:00.000Z',
+                                '2022-01-01T00:10:00.000Z'],
+                       'Hs_0': [1.5, np.nan]})
+    df2 = _from_shared(*_to_shared(df))
+    pd.testing.assert_frame_equal(df, df2)
+
+def test_record_replay(tmp_path):
+    from printobs.utils import record_frost_response, replay_frost_api
+    from printobs.utils import FrostRecord
+    r = FrostRecord(b'{"data": {"tseries": []}}', 'https://frost')
+    record_frost_response(r, str(tmp_path), 'draugen',
+                          datetime(2022,1,1), datetime(2022,2,1), 'v1')
+    record_frost_response(r, str(tmp_path), 'draugen',
+                          datetime(2022,2,1), datetime(2022,3,1), 'v1')
+    rlst = replay_frost_api(datetime(2022,1,15), datetime(2022,1,20),
+                            'draugen', 'v1', str(tmp_path))
+    assert len(rlst) == 1
+    assert rlst[0].json() == r.json()
+    assert len(replay_frost_api(datetime(2022,1,1), datetime(2022,3,1),
+                                'draugen', 'v1', str(tmp_path))) == 2
+
+def test_collocate(tmp_path):
+    import numpy as np
+    import pandas as pd
+    import xarray as xr
+    from printobs.collocation import collocate
+    # curvilinear 2D grid, value encodes time step and grid indices
+    y, x = np.meshgrid(np.arange(20), np.arange(30), indexing='ij')
+    time = pd.date_range('2022-01-01', periods=48, freq='h')
+    hs = (np.arange(48)[:, None, None]*10000. + y*100 + x)
+    ds = xr.Dataset({'hs': (('time', 'y', 'x'), hs)},
+                    coords={'time': time,
+                            'lat': (('y', 'x'), 60 + y*.1),
+                            'lon': (('y', 'x'), 2 + x*.2)})
+    ptf = str(tmp_path / 'model.nc')
+    ds.to_netcdf(ptf)
+    tstr = pd.date_range('2022-01-01', periods=12, freq='10min')\
+             .strftime('%Y-%m-%dT%H:%M:%SZ')
+    df = pd.DataFrame({'time': tstr, 'Hs_0': np.arange(12.)})
+    static = pd.DataFrame({'time': [None], 'lat': [60.5], 'lon': [3.0]})
+    moving = pd.DataFrame({'time': tstr, 'lat': 60.5, 'lon': 3.0})
+    moving.loc[6:, 'lat'] = 61.0
+    cdf = collocate({'a': (df, static), 'b': (df, moving)}, ptf)
+    # only the full hours match with the default tolerance
+    assert list(cdf['station']) == ['a', 'a', 'b', 'b']
+    assert list(cdf['model_hs']) == [505., 10505., 505., 11005.]
+
+def test_plan_time_windows():
+    from printobs.inventory import decode_frost_inventory
+    from printobs.inventory import plan_time_windows, format_inventory
+    def header(element, sensor, start, end=None):
+        h = {'id': {'sensor': sensor, 'level': 0, 'parameterid': 136},
+             'extra': {'element': {'id': element}},
+             'available': {'from': start}}
+        if end is not None:
+            h['available']['to'] = end
+        return {'header': h}
+    data = {'data': {'tseries': [
+        header('sea_surface_wave_significant_height', 0,
+               '2022-01-01T00:00:00Z', '2022-02-01T00:00:00Z'),
+        header('sea_surface_wave_significant_height', 1,
+               '2022-04-10T00:00:00Z'),
+        header('not_in_variable_def', 0, '2000-01-01T00:00:00Z')]}}
+    inv = decode_frost_inventory(data)
+    assert list(inv['sensor']) == [0, 1]
+    inv.attrs['sdate'] = datetime(2022,1,1)
+    inv.attrs['edate'] = datetime(2022,6,1)
+    # february and march are skipped
+    windows = plan_time_windows(datetime(2022,1,1), datetime(2022,6,1),
+                                inv, 'MS')
+    assert [w[0].month for w in windows] == [1, 4, 5]
+    # january data (4464 obs) fits in one window, empty days split
+    windows = plan_time_windows(datetime(2022,1,1), datetime(2022,6,1),
+                                inv, max_obs=5000)
+    assert windows[0] == (datetime(2022,1,1), datetime(2022,2,1))
+    assert windows[1][0] == datetime(2022,4,10)
+    table = format_inventory(inv, datetime(2022,1,1), datetime(2022,6,1))
+    assert '#....' in table and '...##' in table
+    # empty inventory, monthly windows outside the inventoried period
+    empty = decode_frost_inventory({'data': {'tseries': []}})
+    empty.attrs['sdate'] = datetime(2022,1,1)
+    empty.attrs['edate'] = datetime(2022,2,1)
+    windows = plan_time_windows(datetime(2021,11,1), datetime(2022,4,1),
+                                empty)
+    assert windows == [(datetime(2021,11,1), datetime(2021,12,1)),
+                       (datetime(2021,12,1), datetime(2022,1,1)),
+                       (datetime(2022,2,1), datetime(2022,3,1)),
+                       (datetime(2022,3,1), datetime(2022,4,1))]
+
+def test_plot_df_v0(tmp_path):
+    import pandas as pd
+    from printobs.plotting import plot_df, plot_batch
+    df = pd.DataFrame({'time': ['2022-01-01T00:00:00.000Z',
+                                '2022-01-01T00:10:00.000Z'],
+                       'Hs': [1., 2.], 'FF': [5., 6.]})
+    ptf = str(tmp_path / 'v0.png')
+    assert plot_df(df, ptf) == ptf
+    assert plot_batch([]) == []
+
+def test_collocate_moving_decode_parallel(tmp_path):
+    import json
+    import numpy as np
+    import pandas as pd
+    import xarray as xr
+    from printobs.decode import decode_parallel, merge_frost_dfs
+    from printobs.collocation import collocate
+    lat = np.arange(60, 62.01, .1)
+    lon = np.arange(2, 6.01, .2)
+    time = pd.date_range('2022-01-01', periods=6, freq='h')
+    hs = np.broadcast_to(lat[None, :, None], (6, len(lat), len(lon)))
+    xr.Dataset({'hs': (('time', 'lat', 'lon'), hs.copy())},
+               coords={'time': time, 'lat': lat, 'lon': lon})\
+      .to_netcdf(str(tmp_path / 'model.nc'))
+    # frost style times and moving platform heading north
+    tstr = pd.date_range('2022-01-01', periods=36, freq='10min')\
+             .strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    obs = [{'time': t, 'body': {'value': '1.0', 'lat': str(60 + n/20),
+                                'lon': '3.0'}}
+           for n, t in enumerate(tstr)]
+    data = {'data': {'tseries': [{'header': {
+                'id': {'sensor': 0, 'level': 0, 'parameterid': 136},
+                'extra': {'element':
+                    {'id': 'sea_surface_wave_significant_height'}}},
+                'observations': obs}]}}
+    df, dinfo, loc = merge_frost_dfs(
+            decode_parallel([json.dumps(data).encode()], 'v1', 1,
+                            with_location=True))
+    cdf = collocate({'ship': (df, loc)}, str(tmp_path / 'model.nc'))
+    assert len(cdf) == 6
+    np.testing.assert_allclose(cdf['lat'], 60 + np.arange(6)*6/20)
+    np.testing.assert_allclose(cdf['model_hs'], cdf['lat'], atol=.05)
+    # positions are joined on parsed times, not on the strings
+    from printobs.collocation import make_points
+    loc2 = loc.assign(time=pd.to_datetime(loc['time'])
+                             .dt.strftime('%Y-%m-%dT%H:%M:%SZ'))
+    assert make_points({'ship': (df, loc2)})['lat'].notnull().all()
+
+def test_decode_frost_df_v1_empty_observations():
+    from printobs.utils import decode_frost_df_v1, decode_frost_location
+    def series(sensor, obs):
+        return {'header': {
+                    'id': {'sensor': sensor, 'level': 0,
+                           'parameterid': 136},
+                    'extra': {'element':
+                        {'id': 'sea_surface_wave_significant_height'},
+                        'station': {'location': [{'value':
+                            {'latitude': '65.0', 'longitude': '7.0'}}]}}},
+                'observations': obs}
+    obs = [{'time': '2022-01-01T00:00:00.000Z', 'body': {'value': '1.5'}}]
+    df, dinfo = decode_frost_df_v1(
+            {'data': {'tseries': [series(0, []), series(1, obs)]}})
+    assert list(df.keys()) == ['time', 'Hs_1']
+    assert len(df) == 1
+    assert decode_frost_location(
+            {'data': {'tseries': [series(0, []), series(1, obs)]}})\
+            ['lat'].values[0] == 65.0
+    # only headers, no observations at all
+    df, dinfo = decode_frost_df_v1(
+            {'data': {'tseries': [series(0, []), series(1, [])]}})
+    assert len(df) == 0